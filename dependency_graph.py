@@ -1,22 +1,58 @@
 """Модуль для построения графа зависимостей."""
 
-from typing import Dict, List, Set, Optional
+import io
+import sys
+from array import array
+from collections import deque
+from typing import Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
 from package_manager import UbuntuPackageManager
 
 
+# Режимы построения графа: полное дерево, список пакетов, только счётчики
+BUILD_MODES = ("tree", "flat", "counts")
+
+# Счётчики, которые ведутся при обходе для режимов без дерева
+COUNT_KEYS = ("total_packages", "max_depth_reached", "errors_count", "cycles_count")
+
+# Отступы журнала обхода по глубине
+INDENTS = tuple('  ' * i for i in range(64))
+
+
+class FlatGraph(NamedTuple):
+    """Плоское представление графа: по одному элементу массивов на узел."""
+    names: List[str]
+    depths: array
+    parent_idx: array
+    is_error: bytearray
+    is_cycle: bytearray
+
+
 class DependencyGraph:
     """Класс для построения и анализа графа зависимостей."""
 
-    def __init__(self, package_manager: UbuntuPackageManager):
+    def __init__(self, package_manager: UbuntuPackageManager, verbose: bool = True):
         self.package_manager = package_manager
+        self.verbose = verbose
         self.visited = set()
         self.cycle_detected = False
+        self._nodes: Dict[Tuple[str, int], Dict] = {}
+        self._subtrees: Dict[Tuple[str, int], int] = {}
+        self._name_bits: Dict[str, int] = {}
+        self._path_dependent: Set[Tuple[str, int]] = set()
+        self._flat: Optional[FlatGraph] = None
+        self._flat_source: Optional[Dict] = None
+        self._log: Optional[io.StringIO] = None
+        self._indents = INDENTS
+        self._counts = dict.fromkeys(COUNT_KEYS, 0)
+        self._link_children = True
+        self._edges: Optional[Set[Tuple[str, str]]] = None
 
     def build_dependency_graph(self,
                                package_name: str,
                                version: str,
                                max_depth: int = 5,
-                               filter_substring: str = "") -> Dict:
+                               filter_substring: str = "",
+                               build_mode: str = "tree") -> Dict:
         """Строит граф зависимостей с помощью DFS.
 
         Args:
@@ -24,116 +60,284 @@ class DependencyGraph:
             version: Версия пакета
             max_depth: Максимальная глубина рекурсии
             filter_substring: Подстрока для фильтрации пакетов
+            build_mode: Что сохранять в результате: 'tree' - вложенное
+                дерево зависимостей, 'flat' - список посещённых пакетов
+                и список рёбер [пакет, зависимость], 'counts' - только
+                счётчики для статистики
 
         Returns:
             Словарь с графом зависимостей
         """
+        if build_mode not in BUILD_MODES:
+            raise ValueError(f"Некорректный режим построения графа. "
+                             f"Доступные значения: {', '.join(BUILD_MODES)}")
+
         self.visited = set()
         self.cycle_detected = False
+        self._counts = dict.fromkeys(COUNT_KEYS, 0)
+        self._link_children = build_mode == "tree"
+        self._edges = set() if build_mode == "flat" else None
 
         graph = {
             'root': package_name,
+            'build_mode': build_mode,
             'dependencies': {},
             'cycles': [],
             'filtered_count': 0
         }
 
         print(f"🔍 Построение графа зависимостей для {package_name}...")
-        self._dfs_build_graph(package_name, version, graph['dependencies'],
-                              max_depth, 0, filter_substring, [])
+        # Журнал обхода ведётся только в подробном режиме
+        self._log = io.StringIO() if self.verbose else None
+        if max_depth + 2 > len(INDENTS):
+            self._indents = tuple('  ' * i for i in range(max_depth + 2))
+        else:
+            self._indents = INDENTS
+
+        # Без дерева узлы не заполняются: на узел хранится только маска
+        # поддерева в self._subtrees
+        root_node = graph['dependencies'] if self._link_children else None
+        self._dfs_build_graph(package_name, version, root_node,
+                              max_depth, filter_substring)
+
+        # Журнал обхода выводится одной записью после построения графа
+        if self.verbose:
+            sys.stdout.write(self._log.getvalue())
 
         if self.cycle_detected:
             print("⚠️  Обнаружены циклические зависимости!")
         else:
             print("✅ Циклические зависимости не обнаружены")
 
+        self.visited = {name for name, _ in self._subtrees}
+
+        if build_mode == "tree":
+            self._flat = self._flatten_graph(graph)
+            self._flat_source = graph
+        else:
+            # Узлы дерева не заполнялись, статистика берётся из счётчиков обхода
+            graph['counts'] = dict(self._counts)
+            if build_mode == "flat":
+                graph['packages'] = sorted(self.visited)
+                graph['edges'] = [list(edge) for edge in sorted(self._edges)]
+
         return graph
 
     def _dfs_build_graph(self,
                          package_name: str,
                          version: str,
-                         graph_node: Dict,
+                         graph_node: Optional[Dict],
                          max_depth: int,
-                         current_depth: int,
-                         filter_substring: str,
-                         path: List[str]) -> None:
-        """Рекурсивно строит граф с помощью DFS.
+                         filter_substring: str) -> None:
+        """Строит граф итеративным DFS с явным стеком.
+
+        Для каждого построенного поддерева в self._subtrees по ключу
+        (имя, глубина) хранится битовая маска имён пакетов в нём. Если тот
+        же пакет встречается на той же глубине, родитель получает ссылку
+        на уже построенный узел вместо копии поддерева: с тем же остатком
+        глубины поддерево было бы таким же, если ни один его пакет не
+        лежит на текущем пути (иначе там был бы цикл). Узлы, в поддереве
+        которых найден цикл к предку вне этого поддерева, зависят от пути
+        и повторно не используются.
+
+        Args:
+            package_name: Имя корневого пакета
+            version: Версия корневого пакета
+            graph_node: Узел графа для корневого пакета
+            max_depth: Максимальная глубина
+            filter_substring: Подстрока для фильтрации
+        """
+        self._nodes = {}
+        self._subtrees = {}
+        self._name_bits = {}
+        self._path_dependent = set()
+        path: List[str] = []
+        path_set: Set[str] = set()
+        stack: List[Tuple[str, Optional[Dict], int, Iterator[str]]] = []
+        # Маски имён поддеревьев узлов на стеке, накапливаются по мере обхода
+        masks: List[int] = []
+        indents = self._indents
+        log = self._log
+        link_children = self._link_children
+        edges = self._edges
+        subtrees = self._subtrees
+        name_bits = self._name_bits
+
+        self._visit_node(package_name, version, graph_node, max_depth, 0,
+                         filter_substring, path, path_set, stack, masks)
+
+        while stack:
+            current_package, node, current_depth, deps_iter = stack[-1]
+            dep = next(deps_iter, None)
+
+            if dep is None:
+                stack.pop()
+                path.pop()
+                path_set.discard(current_package)
+                mask = masks.pop()
+                subtrees[(current_package, current_depth)] = mask
+                if masks:
+                    masks[-1] |= mask
+                continue
+
+            if log is not None:
+                log.write(f"{indents[current_depth + 1]}🔗 Зависимость: {dep}\n")
+            if edges is not None:
+                edges.add((current_package, dep))
+
+            if link_children and dep in node['dependencies']:
+                continue
+
+            # Повторное использование поддерева, построенного на той же глубине
+            key = (dep, current_depth + 1)
+            mask = subtrees.get(key)
+            if (mask is not None and key not in self._path_dependent
+                    and not any(mask & name_bits[name] for name in path)):
+                masks[-1] |= mask
+                if link_children:
+                    node['dependencies'][dep] = self._nodes[key]
+                continue
+
+            child = None
+            if link_children:
+                child = node['dependencies'][dep] = {}
+            parent = len(masks) - 1
+            masks[parent] |= self._visit_node(dep, "", child, max_depth, current_depth + 1,
+                                              filter_substring, path, path_set, stack, masks)
+
+    def _visit_node(self,
+                    package_name: str,
+                    version: str,
+                    graph_node: Optional[Dict],
+                    max_depth: int,
+                    current_depth: int,
+                    filter_substring: str,
+                    path: List[str],
+                    path_set: Set[str],
+                    stack: List[Tuple[str, Optional[Dict], int, Iterator[str]]],
+                    masks: List[int]) -> int:
+        """Заполняет узел пакета и кладёт его зависимости на стек обхода.
 
         Args:
             package_name: Имя текущего пакета
             version: Версия пакета
-            graph_node: Текущий узел графа
+            graph_node: Текущий узел графа (None, если дерево не строится)
             max_depth: Максимальная глубина
             current_depth: Текущая глубина
             filter_substring: Подстрока для фильтрации
             path: Текущий путь для обнаружения циклов
+            path_set: Множество пакетов текущего пути для проверки за O(1)
+            stack: Стек обхода
+            masks: Маски имён поддеревьев узлов на стеке
+
+        Returns:
+            Маску имён завершённого поддерева; 0, если узел положен на стек
+            (его маска передаётся родителю при снятии со стека) или лежит
+            глубже max_depth
         """
         if current_depth > max_depth:
-            return
+            return 0
+
+        indents = self._indents
+        log = self._log
+        counts = self._counts
+        counts['total_packages'] += 1
+        if current_depth > counts['max_depth_reached']:
+            counts['max_depth_reached'] = current_depth
+
+        bit = self._name_bits.get(package_name)
+        if bit is None:
+            bit = self._name_bits[package_name] = 1 << len(self._name_bits)
 
         # Проверка на циклы
-        if package_name in path:
-            cycle = path[path.index(package_name):] + [package_name]
+        if package_name in path_set:
+            cycle_start = path.index(package_name)
+            cycle = path[cycle_start:] + [package_name]
             cycle_str = " -> ".join(cycle)
-            print(f" Обнаружен цикл: {cycle_str}")
+            # Поддеревья пакетов внутри цикла зависят от текущего пути.
+            # Глубина пакета на пути совпадает с его индексом.
+            self._path_dependent.update(
+                (path[depth], depth) for depth in range(cycle_start + 1, len(path))
+            )
+            if log is not None:
+                log.write(f" Обнаружен цикл: {cycle_str}\n")
             self.cycle_detected = True
-            graph_node['cycle'] = cycle_str
-            return
+            counts['cycles_count'] += 1
+            if graph_node is not None:
+                graph_node['cycle'] = cycle_str
+            return bit
 
-        current_path = path + [package_name]
+        key = (package_name, current_depth)
+        if graph_node is not None:
+            self._nodes[key] = graph_node
 
         try:
             # Получаем информацию о пакете
-            package_info = self.package_manager.get_package_info(package_name, version)
-            dependencies = self.package_manager.get_package_dependencies(package_name, version)
+            package_info, dependencies = self.package_manager.get_package_bundle(
+                package_name, version, log, quiet=log is None
+            )
 
             # Заполняем информацию о текущем пакете
-            graph_node['package'] = package_name
-            graph_node['version'] = package_info['version']
-            graph_node['depth'] = current_depth
-            graph_node['dependencies'] = {}
+            if graph_node is not None:
+                graph_node['package'] = package_name
+                graph_node['version'] = package_info['version']
+                graph_node['depth'] = current_depth
+                graph_node['dependencies'] = {}
 
-            print(f"{'  ' * current_depth} {package_name} (глубина {current_depth})")
+            if log is not None:
+                log.write(f"{indents[current_depth]} {package_name} (глубина {current_depth})\n")
 
             # Фильтрация зависимостей
             filtered_dependencies = []
             for dep in dependencies:
                 if filter_substring and filter_substring.lower() in dep.lower():
-                    print(f"{'  ' * (current_depth + 1)} Отфильтровано: {dep}")
-                    graph_node['filtered_count'] = graph_node.get('filtered_count', 0) + 1
+                    if log is not None:
+                        log.write(f"{indents[current_depth + 1]} Отфильтровано: {dep}\n")
+                    if graph_node is not None:
+                        graph_node['filtered_count'] = graph_node.get('filtered_count', 0) + 1
                     continue
                 filtered_dependencies.append(dep)
 
             if not filtered_dependencies:
-                print(f"{'  ' * (current_depth + 1)}✅ Нет зависимостей")
-                return
-
-            # Рекурсивный обход зависимостей
-            for dep in filtered_dependencies:
-                print(f"{'  ' * (current_depth + 1)}🔗 Зависимость: {dep}")
-
-                if dep not in graph_node['dependencies']:
-                    graph_node['dependencies'][dep] = {}
-
-                    # Рекурсивный вызов для зависимости
-                    self._dfs_build_graph(dep, "", graph_node['dependencies'][dep],
-                                          max_depth, current_depth + 1,
-                                          filter_substring, current_path)
+                if log is not None:
+                    log.write(f"{indents[current_depth + 1]}✅ Нет зависимостей\n")
+                self._subtrees[key] = bit
+                return bit
 
         except Exception as e:
-            graph_node['error'] = str(e)
-            print(f"{'  ' * current_depth}❌ Ошибка для {package_name}: {e}")
-
-    def print_ascii_tree(self, graph: Dict, indent: int = 0) -> None:
+            if graph_node is not None:
+                graph_node['error'] = str(e)
+            counts['errors_count'] += 1
+            if log is not None:
+                log.write(f"{indents[current_depth]}❌ Ошибка для {package_name}: {e}\n")
+            self._subtrees[key] = bit
+            return bit
+
+        path.append(package_name)
+        path_set.add(package_name)
+        masks.append(bit)
+        stack.append((package_name, graph_node, current_depth, iter(filtered_dependencies)))
+        return 0
+
+    def print_ascii_tree(self,
+                         graph: Dict,
+                         indent: int = 0,
+                         seen: Optional[Set[int]] = None) -> None:
         """Выводит граф в виде ASCII-дерева.
 
         Args:
             graph: Граф зависимостей
             indent: Уровень отступа
+            seen: Идентификаторы уже выведенных узлов (общие поддеревья
+                выводятся один раз)
         """
         if not graph or not isinstance(graph, dict):
             return
 
+        if seen is None:
+            seen = set()
+        seen.add(id(graph))
+
         try:
             # Выводим информацию о текущем пакете
             if 'package' in graph:
@@ -165,12 +369,16 @@ class DependencyGraph:
                     is_last = i == len(dep_names) - 1
                     prefix = "    " * indent + ("└── " if is_last else "├── ")
 
+                    if id(dep_graph) in seen:
+                        print(f"{prefix}{dep_name} (см. выше)")
+                        continue
+
                     print(f"{prefix}{dep_name}")
 
                     # Рекурсивно обрабатываем поддерево зависимости
                     if isinstance(dep_graph, dict):
                         new_indent = indent + 1
-                        self.print_ascii_tree(dep_graph, new_indent)
+                        self.print_ascii_tree(dep_graph, new_indent, seen)
 
         except Exception as e:
             print(f"❌ Ошибка при выводе дерева: {e}")
@@ -184,43 +392,67 @@ class DependencyGraph:
         Returns:
             Словарь со статистикой
         """
+        if 'counts' in graph:
+            return {
+                **graph['counts'],
+                'root_package': graph.get('root', ''),
+                'filtered_count': graph.get('filtered_count', 0)
+            }
 
-        def count_nodes(node):
-            if not node:
-                return 0, 0
-
-            total = 1
-            errors = 1 if 'error' in node else 0
-            cycles = 1 if 'cycle' in node else 0
-
-            if 'dependencies' in node:
-                for dep in node['dependencies'].values():
-                    dep_total, dep_errors, dep_cycles = count_nodes(dep)
-                    total += dep_total
-                    errors += dep_errors
-                    cycles += dep_cycles
-
-            return total, errors, cycles
-
-        total, errors, cycles = count_nodes(graph.get('dependencies', {}))
+        flat = self._get_flat_graph(graph)
 
         return {
-            'total_packages': total,
+            'total_packages': len(flat.names),
             'root_package': graph.get('root', ''),
             'max_depth_reached': self._get_max_depth(graph),
-            'errors_count': errors,
-            'cycles_count': cycles,
+            'errors_count': sum(flat.is_error),
+            'cycles_count': sum(flat.is_cycle),
             'filtered_count': graph.get('filtered_count', 0)
         }
 
     def _get_max_depth(self, graph: Dict) -> int:
         """Находит максимальную глубину графа."""
+        return max(self._get_flat_graph(graph).depths, default=0)
+
+    def _get_flat_graph(self, graph: Dict) -> FlatGraph:
+        """Возвращает плоское представление графа, строя его один раз."""
+        if self._flat_source is not graph:
+            self._flat = self._flatten_graph(graph)
+            self._flat_source = graph
+        return self._flat
+
+    def _flatten_graph(self, graph: Dict) -> FlatGraph:
+        """Разворачивает вложенный граф в плоские массивы обходом в ширину.
 
-        def find_depth(node, current_depth):
-            max_depth = current_depth
-            if 'dependencies' in node:
-                for dep in node['dependencies'].values():
-                    max_depth = max(max_depth, find_depth(dep, current_depth + 1))
-            return max_depth
+        Каждый узел попадает в массивы один раз, даже если на него
+        ссылаются несколько родителей. Пустые узлы (за пределом
+        максимальной глубины) не учитываются.
 
-        return find_depth(graph.get('dependencies', {}), 0)
\ No newline at end of file
+        Args:
+            graph: Граф зависимостей
+
+        Returns:
+            Плоское представление графа
+        """
+        flat = FlatGraph([], array('i'), array('i'), bytearray(), bytearray())
+        index: Dict[int, int] = {}
+        queue = deque([(graph.get('dependencies', {}), graph.get('root', ''), -1, 0)])
+
+        while queue:
+            node, name, parent, depth = queue.popleft()
+            if not node or id(node) in index:
+                continue
+
+            node_idx = len(flat.names)
+            node_depth = node.get('depth', depth)
+            index[id(node)] = node_idx
+            flat.names.append(node.get('package', name))
+            flat.depths.append(node_depth)
+            flat.parent_idx.append(parent)
+            flat.is_error.append('error' in node)
+            flat.is_cycle.append('cycle' in node)
+
+            for dep_name, dep in node.get('dependencies', {}).items():
+                queue.append((dep, dep_name, node_idx, node_depth + 1))
+
+        return flat
@@ -4,16 +4,14 @@ import argparse
 import sys
 import json
 import os
-from validators import (
-    validate_package_name,
-    validate_repository,
-    validate_mode,
-    validate_version,
-    validate_output_file,
-    validate_ascii_mode,
-    validate_max_depth,
-    validate_filter
-)
+from datetime import datetime
+
+try:
+    import orjson
+except ImportError:  # orjson необязателен: без него используется json
+    orjson = None
+
+from validators import validate_cli_args
 from package_manager import UbuntuPackageManager
 from dependency_graph import DependencyGraph
 
@@ -87,8 +85,7 @@ def run_stage_2(package: str, repo: str, version: str):
     print(f"\n=== Этап 2: Сбор данных о зависимостях пакета {package} ===")
 
     package_manager = UbuntuPackageManager(repo)
-    package_info = package_manager.get_package_info(package, version)
-    dependencies = package_manager.get_package_dependencies(package, version)
+    package_info, dependencies = package_manager.get_package_bundle(package, version)
 
     print(f"\n📦 Информация о пакете {package}:")
     print(f"   Версия: {package_info['version']}")
@@ -116,7 +113,8 @@ def run_stage_3(package_manager: UbuntuPackageManager,
     print(f"Максимальная глубина: {max_depth}")
     print(f"Фильтр: '{filter_substring}'" if filter_substring else "Фильтр: не задан")
 
-    # Строим граф зависимостей
+    # Строим граф зависимостей: полное дерево нужно и для ASCII-вывода,
+    # и для сохранения в dependencies.json
     graph_builder = DependencyGraph(package_manager)
     dependency_graph = graph_builder.build_dependency_graph(
         package, version, max_depth, filter_substring
@@ -148,11 +146,15 @@ def save_dependencies_data(package: str, version: str, graph: dict, stats: dict)
         'version': version,
         'graph': graph,
         'statistics': stats,
-        'timestamp': str(__import__('datetime').datetime.now())
+        'timestamp': datetime.now().isoformat()
     }
 
-    with open('dependencies.json', 'w', encoding='utf-8') as f:
-        json.dump(dependency_data, f, indent=2, ensure_ascii=False)
+    if orjson is not None:
+        with open('dependencies.json', 'wb') as f:
+            f.write(orjson.dumps(dependency_data, option=orjson.OPT_INDENT_2))
+    else:
+        with open('dependencies.json', 'w', encoding='utf-8') as f:
+            json.dump(dependency_data, f, indent=2, ensure_ascii=False)
 
     print(f"\n Данные сохранены в dependencies.json")
 
@@ -164,24 +166,20 @@ def main():
 
     try:
         # Валидация входных параметров
-        package = validate_package_name(args.package)
-        repo = validate_repository(args.repo)
-        mode = validate_mode(args.mode)
-        version = validate_version(args.version)
-        output = validate_output_file(args.output)
-        ascii_mode = validate_ascii_mode(args.ascii)
-        max_depth = validate_max_depth(args.max_depth)
-        filter_substring = validate_filter(args.filter)
+        validated = validate_cli_args(args)
+        package, version = validated.package, validated.version
 
         print_configuration(args)
 
         # Этап 2: Сбор данных о зависимостях
-        package_manager, package_info, dependencies = run_stage_2(package, repo, version)
+        package_manager, package_info, dependencies = run_stage_2(
+            package, validated.repo, version
+        )
 
         # Этап 3: Построение графа зависимостей
         dependency_graph, stats = run_stage_3(
-            package_manager, package, version, max_depth,
-            filter_substring, ascii_mode
+            package_manager, package, version, validated.max_depth,
+            validated.filter, validated.ascii
         )
 
         # Сохранение результатов
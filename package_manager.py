@@ -2,21 +2,87 @@
 
 import re
 import requests
-from urllib.parse import urlparse, urljoin
-from typing import List, Dict
+import urllib3
+from contextlib import contextmanager, suppress
+from typing import BinaryIO, List, Dict, Iterable, Iterator, Optional, TextIO, Tuple
 import gzip
-import io
+import hashlib
+import itertools
+import os
+import pickle
+import sys
+import tempfile
+import threading
+import time
+import zlib
+
+# Поля записи Packages, которые нужны для построения графа.
+# Строки-продолжения (начинающиеся с пробела) входят в значение поля.
+# Разбор ведётся по байтам, в str декодируются только сохраняемые значения.
+PACKAGE_FIELD_RE = re.compile(
+    rb'^(Package|Version|Description|Depends|Pre-Depends|Architecture): (.*(?:\n .*)*)',
+    re.M
+)
+
+# Имя пакета в начале альтернативы зависимости
+DEPENDENCY_NAME_RE = re.compile(rb'([A-Za-z0-9][A-Za-z0-9+\-.]*)')
+
+# Ошибки загрузки, распаковки и разбора, после которых пробуется следующее
+# зеркало. urllib3 поднимает свои исключения при чтении response.raw посреди
+# потока; UnicodeDecodeError означает повреждённые данные в записи.
+DOWNLOAD_ERRORS = (
+    requests.RequestException,
+    urllib3.exceptions.HTTPError,
+    OSError,
+    EOFError,
+    zlib.error,
+    UnicodeDecodeError,
+)
+
+# Дисковый кэш распаршенных пакетов (каталог переопределяется PKG_CACHE_DIR)
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'ubuntu_pkg')
+CACHE_MAX_AGE = 24 * 60 * 60
+# Меняется при изменении структуры записей пакетов, чтобы не читать старый кэш
+CACHE_FORMAT_VERSION = 2
 
 
 class UbuntuPackageManager:
     """Класс для управления пакетами Ubuntu и их зависимостями."""
 
-    def __init__(self, repository_url: str):
+    def __init__(self, repository_url: str, keep_descriptions: bool = False):
         self.repository_url = repository_url
+        # Полные описания нужны только для подробного вывода; по умолчанию
+        # хранится лишь первая строка (краткое описание)
+        self._keep_descriptions = keep_descriptions
         self.package_cache = {}
+        self._info_memo: Dict[Tuple[str, str], Dict] = {}
+        self._lower_names: Dict[str, str] = {}
+        self._load_lock = threading.Lock()
+        self._cache_loaded = False
+
+    @contextmanager
+    def _open_packages_file(self, packages_url: str) -> Iterator[BinaryIO]:
+        """Открывает Packages.gz как поток байтовых строк с распаковкой на лету.
 
-    def _download_packages_file(self) -> str:
-        """Скачивает файл Packages.gz и распаковывает его."""
+        Файл не загружается в память целиком: строки читаются из
+        HTTP-ответа по мере распаковки.
+        """
+        response = requests.get(packages_url, stream=True, timeout=30)
+        with response:
+            if response.status_code != 200:
+                raise requests.HTTPError(f"HTTP {response.status_code} для {packages_url}")
+
+            print("✅ Соединение установлено, файл распаковывается потоком")
+            response.raw.decode_content = True
+            with gzip.GzipFile(fileobj=response.raw) as gz_file:
+                yield gz_file
+
+    def _download_packages(self) -> Dict:
+        """Загружает и разбирает Packages.gz с первого работающего зеркала.
+
+        Разбор идёт внутри перебора зеркал: если соединение оборвалось
+        или архив повреждён посреди потока, пробуется следующий URL.
+        """
         # Рабочие URL для Ubuntu 20.04 LTS (Focal Fossa)
         packages_urls = [
             # Main repository
@@ -32,115 +98,217 @@ class UbuntuPackageManager:
             print(f"Попытка загрузки: {packages_url}")
 
             try:
-                response = requests.get(packages_url, timeout=30)
-                if response.status_code == 200:
-                    print(f"✅ Файл успешно загружен ({len(response.content)} bytes)")
-
-                    # Распаковываем .gz файл
-                    with gzip.open(io.BytesIO(response.content), 'rt', encoding='utf-8') as f:
-                        content = f.read()
-                        print(f"Распаковано {len(content)} символов")
-                        return content
-                else:
-                    print(f"❌ HTTP {response.status_code} для {packages_url}")
-
-            except Exception as e:
+                with self._open_packages_file(packages_url) as stream:
+                    return self._parse_packages_file(stream)
+            except DOWNLOAD_ERRORS as e:
                 print(f"❌ Ошибка: {e}")
-                continue
 
         raise Exception("Не удалось загрузить файл Packages ни из одного источника")
 
-    def _parse_packages_file(self, content: str) -> Dict:
-        """Парсит содержимое файла Packages."""
+    def _cache_file_path(self) -> str:
+        """Возвращает путь к файлу дискового кэша для репозитория."""
+        cache_dir = os.environ.get('PKG_CACHE_DIR') or DEFAULT_CACHE_DIR
+        cache_key = hashlib.sha256(self.repository_url.encode('utf-8')).hexdigest()[:16]
+        suffix = "-full" if self._keep_descriptions else ""
+        return os.path.join(cache_dir, f"{cache_key}{suffix}.v{CACHE_FORMAT_VERSION}.pkl.gz")
+
+    def _read_disk_cache(self, cache_path: str) -> Optional[Dict]:
+        """Читает распаршенные пакеты с диска, если кэш свежий."""
+        try:
+            if time.time() - os.path.getmtime(cache_path) > CACHE_MAX_AGE:
+                return None
+            with gzip.open(cache_path, 'rb') as f:
+                packages = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"⚠️  Не удалось прочитать кэш {cache_path}: {e}")
+            return None
+
+        print(f"✅ Данные о пакетах загружены из кэша ({len(packages)} пакетов)")
+        return packages
+
+    def _write_disk_cache(self, cache_path: str, packages: Dict) -> None:
+        """Сохраняет распаршенные пакеты на диск."""
+        cache_dir = os.path.dirname(cache_path)
+        tmp_path = None
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            # У каждого процесса свой временный файл: параллельные запуски
+            # не пишут в один файл, os.replace атомарно подменяет кэш целиком
+            fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+            with os.fdopen(fd, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb') as f:
+                pickle.dump(packages, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            print(f"⚠️  Не удалось сохранить кэш {cache_path}: {e}")
+            if tmp_path is not None:
+                with suppress(OSError):
+                    os.remove(tmp_path)
+
+    def _load_package_cache(self) -> None:
+        """Загружает данные о пакетах из дискового кэша или из репозитория.
+
+        Безопасно при вызове из нескольких потоков: загрузка выполняется
+        один раз, остальные потоки ждут её завершения.
+        """
+        with self._load_lock:
+            if self._cache_loaded:
+                return
+
+            cache_path = self._cache_file_path()
+            packages = self._read_disk_cache(cache_path)
+
+            if packages is None:
+                print("🔍 Загрузка данных о пакетах...")
+                packages = self._download_packages()
+                self._write_disk_cache(cache_path, packages)
+
+            self.package_cache = packages
+            # Индекс имён в нижнем регистре для поиска похожих пакетов
+            self._lower_names = {name.lower(): name for name in packages}
+            # Флаг выставляется последним, когда все структуры уже готовы
+            self._cache_loaded = True
+
+    def _ensure_loaded(self) -> None:
+        """Загружает данные о пакетах при первом обращении."""
+        if not self._cache_loaded:
+            self._load_package_cache()
+
+    def _parse_packages_file(self, lines: Iterable[bytes]) -> Dict:
+        """Парсит содержимое файла Packages.
+
+        Args:
+            lines: Байтовые строки файла Packages (файловый объект или список)
+
+        Returns:
+            Словарь пакетов по имени
+        """
         packages = {}
-        current_package = {}
         package_count = 0
+        block = []
+        # Локальные ссылки для горячего цикла: разбор полей записи целиком
+        # выполняется в C-движке re, в Python остаётся только сборка строк
+        find_fields = PACKAGE_FIELD_RE.findall
+        join = b''.join
+        keep_descriptions = self._keep_descriptions
 
-        for line in content.split('\n'):
-            if line == '':
-                if current_package and 'Package' in current_package:
-                    package_name = current_package['Package']
-                    packages[package_name] = {
-                        'name': package_name,
-                        'version': current_package.get('Version', ''),
-                        'description': current_package.get('Description', ''),
-                        'depends': self._parse_dependencies(current_package.get('Depends', '')),
-                        'pre_depends': self._parse_dependencies(current_package.get('Pre-Depends', '')),
-                        'architecture': current_package.get('Architecture', '')
-                    }
-                    package_count += 1
-                current_package = {}
-            else:
-                if ': ' in line:
-                    key, value = line.split(': ', 1)
-                    # Для многострочных описаний
-                    if key in current_package and key in ['Description']:
-                        current_package[key] += '\n' + value
-                    else:
-                        current_package[key] = value
+        for line in itertools.chain(lines, (b'\n',)):
+            if not line.isspace():
+                block.append(line)
+                continue
+            if not block:
+                continue
+
+            current_package = dict(find_fields(join(block)))
+            block.clear()
+            if b'Package' not in current_package:
+                continue
+
+            package_name = sys.intern(current_package[b'Package'].decode('utf-8'))
+            description = current_package.get(b'Description', b'')
+            if not keep_descriptions:
+                description = description.partition(b'\n')[0]
+            depends = self._parse_dependencies(current_package.get(b'Depends', b''))
+            pre_depends = self._parse_dependencies(current_package.get(b'Pre-Depends', b''))
+            pre_depends_set = set(pre_depends)
+            packages[package_name] = {
+                'name': package_name,
+                'version': current_package.get(b'Version', b'').decode('utf-8'),
+                'description': description.decode('utf-8', 'replace'),
+                'depends': depends,
+                'pre_depends': pre_depends,
+                # Pre-Depends идут первыми, как их упорядочивает APT
+                'all_depends': pre_depends + [dep for dep in depends if dep not in pre_depends_set],
+                'architecture': current_package.get(b'Architecture', b'').decode('utf-8')
+            }
+            package_count += 1
 
         print(f"Успешно распаршено {package_count} пакетов")
         return packages
 
-    def _parse_dependencies(self, deps_string: str) -> List[str]:
-        """Парсит строку зависимостей."""
+    def _parse_dependencies(self, deps_string: bytes) -> List[str]:
+        """Парсит строку зависимостей.
+
+        Из каждой группы берётся первая альтернатива без версии и
+        архитектурного квалификатора; повторы отбрасываются. В str
+        декодируются только имена найденных пакетов.
+        """
         if not deps_string:
             return []
 
         dependencies = []
+        seen = set()
 
-        for dep_group in deps_string.split(','):
-            dep_group = dep_group.strip()
-            if not dep_group:
+        for dep_group in deps_string.split(b','):
+            match = DEPENDENCY_NAME_RE.match(dep_group.partition(b'|')[0].lstrip())
+            if not match:
                 continue
 
-            # Обрабатываем альтернативы (разделенные |)
-            alternatives = dep_group.split('|')
-            first_alternative = alternatives[0].strip()
+            name = match.group(1)
+            if name not in seen:
+                seen.add(name)
+                dependencies.append(sys.intern(name.decode('utf-8')))
 
-            # Убираем версии и условия
-            clean_dep = first_alternative.split(' ')[0].split('(')[0].strip()
+        return dependencies
 
-            if clean_dep and clean_dep not in dependencies:
-                dependencies.append(clean_dep)
+    def get_package_bundle(self,
+                           package_name: str,
+                           version: str,
+                           log: Optional[TextIO] = None,
+                           quiet: bool = False) -> Tuple[Dict, List[str]]:
+        """Получает информацию о пакете и его зависимости одним поиском.
 
-        return dependencies
+        Возвращаемый список зависимостей общий с кэшем и не должен
+        изменяться вызывающим кодом.
 
-    def get_package_dependencies(self, package_name: str, version: str) -> List[str]:
-        """Получает зависимости пакета."""
-        if not self.package_cache:
-            print("🔍 Загрузка данных о пакетах...")
-            content = self._download_packages_file()
-            self.package_cache = self._parse_packages_file(content)
+        Args:
+            package_name: Имя пакета
+            version: Версия пакета
+            log: Куда писать сообщение о найденном пакете (по умолчанию stdout)
+            quiet: Не выводить сообщение о найденном пакете
+        """
+        key = (package_name, version)
+        package_info = self._info_memo.get(key)
+        if package_info is None:
+            self._ensure_loaded()
+            package_info = self._find_package(package_name, version, log, quiet)
+            self._info_memo[key] = package_info
 
-        package_info = self._find_package(package_name, version)
+        return package_info, package_info['all_depends']
 
-        # Объединяем обычные и pre-зависимости
-        all_dependencies = package_info['depends'] + package_info['pre_depends']
-        return all_dependencies
+    def get_package_dependencies(self, package_name: str, version: str) -> List[str]:
+        """Получает зависимости пакета."""
+        return list(self.get_package_bundle(package_name, version)[1])
 
     def get_package_info(self, package_name: str, version: str) -> Dict:
         """Получает информацию о пакете."""
-        if not self.package_cache:
-            content = self._download_packages_file()
-            self.package_cache = self._parse_packages_file(content)
+        return self.get_package_bundle(package_name, version)[0]
 
-        return self._find_package(package_name, version)
-
-    def _find_package(self, package_name: str, version: str) -> Dict:
+    def _find_package(self, package_name: str, version: str,
+                      log: Optional[TextIO] = None, quiet: bool = False) -> Dict:
         """Находит пакет в кэше."""
         # Прямой поиск
         if package_name in self.package_cache:
             pkg_info = self.package_cache[package_name]
-            print(f"✅ Найден пакет {package_name} версии {pkg_info['version']}")
+            if quiet:
+                return pkg_info
+            message = f"✅ Найден пакет {package_name} версии {pkg_info['version']}"
+            if log is None:
+                print(message)
+            else:
+                log.write(message + "\n")
             return pkg_info
 
         # Поиск похожих пакетов
-        similar = [pkg for pkg in self.package_cache.keys() if package_name.lower() in pkg.lower()]
+        needle = package_name.lower()
+        similar = list(itertools.islice(
+            (orig for low, orig in self._lower_names.items() if needle in low), 5
+        ))
 
         if similar:
-            raise Exception(f"Пакет '{package_name}' не найден. Похожие пакеты: {', '.join(similar[:5])}")
+            raise Exception(f"Пакет '{package_name}' не найден. Похожие пакеты: {', '.join(similar)}")
         else:
             # Покажем несколько случайных пакетов для примера
-            available = list(self.package_cache.keys())[:10]
+            available = list(itertools.islice(self.package_cache, 10))
             raise Exception(f"Пакет '{package_name}' не найден. Примеры доступных пакетов: {', '.join(available)}")
\ No newline at end of file
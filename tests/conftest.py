@@ -0,0 +1,9 @@
+"""Общая настройка pytest для тестов проекта."""
+
+import os
+import sys
+
+# Добавляем корень проекта в путь для импортов один раз для всех тестов
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
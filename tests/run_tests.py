@@ -1,9 +1,10 @@
 """Скрипт для запуска тестов."""
 
-import subprocess
 import sys
 import os
 
+import pytest
+
 
 def run_tests():
     """Запускает тесты и возвращает результат."""
@@ -21,15 +22,8 @@ def run_tests():
         # Меняем рабочую директорию на корень проекта
         os.chdir(project_root)
 
-        # Запуск pytest с явным указанием пути
-        result = subprocess.run([
-            sys.executable, "-m", "pytest",
-            "tests/",
-            "-v",
-            "--tb=short"
-        ], capture_output=False)
-
-        return result.returncode == 0
+        # Запуск pytest в текущем процессе с явным указанием пути
+        return pytest.main(["tests/", "-v", "--tb=short"]) == 0
 
     except Exception as e:
         print(f"❌ Ошибка при запуске тестов: {e}")
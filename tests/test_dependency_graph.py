@@ -0,0 +1,226 @@
+"""Тесты для модуля dependency_graph."""
+
+import json
+
+import main
+from package_manager import UbuntuPackageManager
+from dependency_graph import DependencyGraph
+
+
+def make_graph_builder(packages):
+    """Создаёт построитель графа над индексом пакетов в памяти.
+
+    Args:
+        packages: Словарь {имя пакета: список зависимостей}
+    """
+    manager = UbuntuPackageManager("test://repo")
+    manager.package_cache = {
+        name: {
+            'name': name,
+            'version': '1.0',
+            'description': '',
+            'depends': list(deps),
+            'pre_depends': [],
+            'all_depends': list(deps),
+            'architecture': 'all'
+        }
+        for name, deps in packages.items()
+    }
+    manager._lower_names = {name.lower(): name for name in packages}
+    manager._cache_loaded = True
+    return DependencyGraph(manager, verbose=False)
+
+
+def collect_depths(node, depth=0):
+    """Возвращает глубины всех узлов по их положению в дереве."""
+    depths = [depth] if node else []
+    for child in node.get('dependencies', {}).values():
+        depths.extend(collect_depths(child, depth + 1))
+    return depths
+
+
+class TestSharedSubtrees:
+    """Тесты повторного использования поддеревьев."""
+
+    def test_same_depth_subtree_is_shared(self):
+        """Пакет на той же глубине ссылается на уже построенный узел."""
+        builder = make_graph_builder({
+            'r': ['a', 'b'], 'a': ['c'], 'b': ['c'], 'c': ['d'], 'd': []
+        })
+        graph = builder.build_dependency_graph('r', '1.0', 5)
+        root = graph['dependencies']
+
+        via_a = root['dependencies']['a']['dependencies']['c']
+        via_b = root['dependencies']['b']['dependencies']['c']
+        assert via_a is via_b
+        assert builder.get_statistics(graph)['total_packages'] == 5
+
+    def test_subtree_not_reused_at_other_depth(self):
+        """Поддерево с другой глубины не выходит за max_depth."""
+        builder = make_graph_builder({
+            'r': ['y', 'm'], 'm': ['y'], 'y': ['z'], 'z': ['w'], 'w': []
+        })
+        graph = builder.build_dependency_graph('r', '1.0', 2)
+        root = graph['dependencies']
+
+        y_via_m = root['dependencies']['m']['dependencies']['y']
+        assert y_via_m is not root['dependencies']['y']
+        assert y_via_m['depth'] == 2
+        assert y_via_m['dependencies']['z'] == {}
+        assert max(collect_depths(root)) == 2
+
+    def test_path_dependent_subtree_not_reused(self):
+        """Поддерево с циклом к внешнему предку строится заново."""
+        builder = make_graph_builder({
+            'r': ['p', 'q'], 'p': ['y'], 'q': ['y'], 'y': ['p']
+        })
+        graph = builder.build_dependency_graph('r', '1.0', 5)
+        root = graph['dependencies']
+
+        y_via_p = root['dependencies']['p']['dependencies']['y']
+        y_via_q = root['dependencies']['q']['dependencies']['y']
+        assert y_via_p['dependencies']['p']['cycle'] == "p -> y -> p"
+        assert y_via_q is not y_via_p
+        assert y_via_q['dependencies']['p']['package'] == 'p'
+
+    def test_subtree_containing_path_package_not_reused(self):
+        """Поддерево с пакетом из текущего пути строится заново с циклом."""
+        builder = make_graph_builder({
+            'r': ['a', 'b'], 'a': ['x'], 'b': ['x'], 'x': ['b']
+        })
+        graph = builder.build_dependency_graph('r', '1.0', 6)
+        root = graph['dependencies']
+
+        x_via_a = root['dependencies']['a']['dependencies']['x']
+        x_via_b = root['dependencies']['b']['dependencies']['x']
+        assert x_via_b is not x_via_a
+        assert x_via_b['dependencies']['b'] == {'cycle': "b -> x -> b"}
+        assert builder.get_statistics(graph)['cycles_count'] == 2
+
+
+class TestCyclesAndErrors:
+    """Тесты обнаружения циклов и ошибок."""
+
+    def test_cycle_reported(self):
+        """Цикл фиксируется в узле и в статистике."""
+        builder = make_graph_builder({'a': ['b'], 'b': ['a']})
+        graph = builder.build_dependency_graph('a', '1.0', 5)
+
+        b_node = graph['dependencies']['dependencies']['b']
+        assert b_node['dependencies']['a'] == {'cycle': "a -> b -> a"}
+        assert builder.cycle_detected
+        assert builder.get_statistics(graph)['cycles_count'] == 1
+
+    def test_missing_package_is_error_node(self):
+        """Отсутствующий пакет становится узлом с ошибкой."""
+        builder = make_graph_builder({'r': ['missing']})
+        graph = builder.build_dependency_graph('r', '1.0', 5)
+
+        missing = graph['dependencies']['dependencies']['missing']
+        assert "не найден" in missing['error']
+        assert builder.get_statistics(graph)['errors_count'] == 1
+
+
+class TestTrace:
+    """Тесты вывода трассировки обхода."""
+
+    def test_lookup_messages_go_to_trace(self, capsys):
+        """Сообщения о найденных пакетах выводятся вместе с трассировкой."""
+        builder = make_graph_builder({'a': ['b'], 'b': []})
+        builder.verbose = True
+        builder.build_dependency_graph('a', '1.0', 5)
+
+        out = capsys.readouterr().out.splitlines()
+        assert out.index("✅ Найден пакет b версии 1.0") == out.index("   b (глубина 1)") - 1
+
+    def test_quiet_build_skips_trace(self, capsys):
+        """Без verbose трассировка не ведётся и не выводится."""
+        builder = make_graph_builder({'a': ['b'], 'b': []})
+        builder.build_dependency_graph('a', '1.0', 5)
+
+        out = capsys.readouterr().out
+        assert "Найден пакет" not in out and "Зависимость" not in out
+        assert builder._log is None
+
+
+class TestMaxDepth:
+    """Тесты ограничения глубины."""
+
+    def test_max_depth_truncation(self):
+        """Пакеты глубже max_depth не разворачиваются."""
+        builder = make_graph_builder({'a': ['b'], 'b': ['c'], 'c': ['d'], 'd': []})
+        graph = builder.build_dependency_graph('a', '1.0', 1)
+
+        b_node = graph['dependencies']['dependencies']['b']
+        assert b_node['depth'] == 1
+        assert b_node['dependencies'] == {'c': {}}
+
+
+class TestStatistics:
+    """Тесты статистики графа."""
+
+    def test_statistics(self):
+        """Статистика учитывает пакеты, глубину, ошибки и циклы."""
+        builder = make_graph_builder({
+            'r': ['a', 'missing'], 'a': ['b'], 'b': ['a']
+        })
+        graph = builder.build_dependency_graph('r', '1.0', 5)
+
+        assert builder.get_statistics(graph) == {
+            'total_packages': 5,
+            'root_package': 'r',
+            'max_depth_reached': 3,
+            'errors_count': 1,
+            'cycles_count': 1,
+            'filtered_count': 0
+        }
+
+
+class TestBuildModes:
+    """Тесты содержимого графа в разных режимах построения."""
+
+    PACKAGES = {'r': ['a', 'b'], 'a': ['c'], 'b': ['c'], 'c': []}
+
+    def test_tree_mode(self):
+        """Режим tree сохраняет вложенные рёбра."""
+        builder = make_graph_builder(self.PACKAGES)
+        graph = builder.build_dependency_graph('r', '1.0', 5, build_mode="tree")
+
+        root = graph['dependencies']
+        assert list(root['dependencies']) == ['a', 'b']
+        assert list(root['dependencies']['a']['dependencies']) == ['c']
+        assert 'packages' not in graph and 'edges' not in graph
+
+    def test_flat_mode(self):
+        """Режим flat сохраняет список пакетов и явный список рёбер."""
+        builder = make_graph_builder(self.PACKAGES)
+        graph = builder.build_dependency_graph('r', '1.0', 5, build_mode="flat")
+
+        assert 'dependencies' not in graph['dependencies']
+        assert graph['packages'] == ['a', 'b', 'c', 'r']
+        assert graph['edges'] == [['a', 'c'], ['b', 'c'], ['r', 'a'], ['r', 'b']]
+        assert builder.get_statistics(graph)['total_packages'] == 4
+
+    def test_counts_mode(self):
+        """Режим counts сохраняет только счётчики."""
+        builder = make_graph_builder(self.PACKAGES)
+        graph = builder.build_dependency_graph('r', '1.0', 5, build_mode="counts")
+
+        assert 'dependencies' not in graph['dependencies']
+        assert 'packages' not in graph and 'edges' not in graph
+        assert graph['counts']['total_packages'] == 4
+        assert builder._nodes == {}
+
+    def test_cli_saves_tree(self, tmp_path, monkeypatch):
+        """CLI сохраняет в dependencies.json граф с рёбрами."""
+        monkeypatch.chdir(tmp_path)
+        builder = make_graph_builder(self.PACKAGES)
+
+        graph, stats = main.run_stage_3(builder.package_manager, 'r', '1.0', 5, "", "no")
+        main.save_dependencies_data('r', '1.0', graph, stats)
+
+        with open(tmp_path / 'dependencies.json', encoding='utf-8') as f:
+            saved = json.load(f)
+        root = saved['graph']['dependencies']
+        assert list(root['dependencies']) == ['a', 'b']
+        assert list(root['dependencies']['b']['dependencies']) == ['c']
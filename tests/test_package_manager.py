@@ -0,0 +1,219 @@
+"""Тесты для модуля package_manager."""
+
+import contextlib
+import gzip
+import io
+import os
+import time
+
+import pytest
+
+import package_manager
+from package_manager import UbuntuPackageManager
+
+
+PACKAGES_TEXT = b"""Package: a
+Version: 1.0
+Depends: b
+
+Package: b
+Version: 2.0
+"""
+
+
+class TestMirrorFallback:
+    """Тесты перебора зеркал при загрузке Packages.gz."""
+
+    def test_broken_stream_falls_back_to_next_mirror(self, monkeypatch):
+        """Обрыв архива посреди потока переводит загрузку на следующий URL."""
+        truncated = gzip.compress(PACKAGES_TEXT)[:-10]
+        streams = iter([
+            gzip.GzipFile(fileobj=io.BytesIO(truncated)),
+            io.BytesIO(PACKAGES_TEXT),
+        ])
+        opened = []
+
+        def fake_open(url):
+            opened.append(url)
+            return contextlib.nullcontext(next(streams))
+
+        manager = UbuntuPackageManager("test://repo")
+        monkeypatch.setattr(manager, '_open_packages_file', fake_open)
+
+        packages = manager._download_packages()
+
+        assert len(opened) == 2
+        assert set(packages) == {'a', 'b'}
+
+    def test_undecodable_record_falls_back_to_next_mirror(self, monkeypatch):
+        """Недекодируемая запись переводит загрузку на следующий URL."""
+        streams = iter([
+            io.BytesIO(b"Package: a\nVersion: \xff\n"),
+            io.BytesIO(PACKAGES_TEXT),
+        ])
+
+        manager = UbuntuPackageManager("test://repo")
+        monkeypatch.setattr(manager, '_open_packages_file',
+                            lambda url: contextlib.nullcontext(next(streams)))
+
+        assert set(manager._download_packages()) == {'a', 'b'}
+
+    def test_all_mirrors_failing_raises(self, monkeypatch):
+        """Если ни одно зеркало не сработало, выбрасывается исключение."""
+        def fake_open(url):
+            raise OSError("connection reset")
+
+        manager = UbuntuPackageManager("test://repo")
+        monkeypatch.setattr(manager, '_open_packages_file', fake_open)
+
+        with pytest.raises(Exception, match="ни из одного источника"):
+            manager._download_packages()
+
+
+def parse(text, keep_descriptions=False):
+    """Разбирает текст файла Packages через байтовый поток."""
+    manager = UbuntuPackageManager("test://repo", keep_descriptions=keep_descriptions)
+    return manager._parse_packages_file(io.BytesIO(text.encode('utf-8')))
+
+
+class TestParsePackagesFile:
+    """Тесты разбора файла Packages."""
+
+    def test_folded_continuation_lines(self):
+        """Строки-продолжения входят в значение поля Depends."""
+        packages = parse(
+            "Package: a\n"
+            "Version: 1.0\n"
+            "Depends: b,\n"
+            " c (>= 2),\n"
+            " d\n"
+            "\n"
+        )
+        assert packages['a']['depends'] == ['b', 'c', 'd']
+
+    def test_package_type_not_read_as_package(self):
+        """Поле Package-Type не подменяет имя пакета."""
+        packages = parse(
+            "Package: a\n"
+            "Package-Type: udeb\n"
+            "Version: 1.0\n"
+            "\n"
+        )
+        assert list(packages) == ['a']
+
+    def test_last_record_without_trailing_blank_line(self):
+        """Последняя запись без пустой строки в конце не теряется."""
+        packages = parse(
+            "Package: a\n"
+            "Version: 1.0\n"
+            "\n"
+            "Package: b\n"
+            "Version: 2.0"
+        )
+        assert set(packages) == {'a', 'b'}
+        assert packages['b']['version'] == '2.0'
+
+    def test_first_alternative_without_version(self):
+        """Из группы альтернатив берётся первая, версия отбрасывается."""
+        packages = parse(
+            "Package: a\n"
+            "Depends: b (>= 1.2) | c, d (<< 3)\n"
+        )
+        assert packages['a']['depends'] == ['b', 'd']
+
+    def test_architecture_qualifier_stripped(self):
+        """Архитектурный квалификатор :any отбрасывается."""
+        packages = parse(
+            "Package: a\n"
+            "Depends: libstdc++6:any (>= 9)\n"
+        )
+        assert packages['a']['depends'] == ['libstdc++6']
+
+    def test_all_depends_order_and_dedup(self):
+        """Pre-Depends идут первыми, повторы из Depends отбрасываются."""
+        packages = parse(
+            "Package: a\n"
+            "Pre-Depends: p, q\n"
+            "Depends: b, q, b, c\n"
+        )
+        assert packages['a']['depends'] == ['b', 'q', 'c']
+        assert packages['a']['all_depends'] == ['p', 'q', 'b', 'c']
+
+    def test_description_truncated_to_first_line(self):
+        """По умолчанию хранится только первая строка описания."""
+        text = (
+            "Package: a\n"
+            "Description: short summary\n"
+            " long description\n"
+        )
+        assert parse(text)['a']['description'] == 'short summary'
+        assert parse(text, keep_descriptions=True)['a']['description'] == (
+            'short summary\n long description'
+        )
+
+
+class TestDiskCache:
+    """Тесты дискового кэша распаршенных пакетов."""
+
+    @pytest.fixture
+    def manager(self, tmp_path, monkeypatch):
+        """Менеджер с кэшем во временном каталоге и подменённой загрузкой."""
+        monkeypatch.setenv('PKG_CACHE_DIR', str(tmp_path))
+        manager = UbuntuPackageManager("test://repo")
+        manager.downloads = 0
+
+        def fake_download():
+            manager.downloads += 1
+            return manager._parse_packages_file(io.BytesIO(PACKAGES_TEXT))
+
+        monkeypatch.setattr(manager, '_download_packages', fake_download)
+        return manager
+
+    def test_write_then_read_round_trip(self, manager, monkeypatch):
+        """Записанный кэш читается без повторной загрузки."""
+        manager._load_package_cache()
+        assert manager.downloads == 1
+
+        cached = manager._read_disk_cache(manager._cache_file_path())
+        assert cached == manager.package_cache
+
+        fresh = UbuntuPackageManager("test://repo")
+        monkeypatch.setattr(fresh, '_download_packages', pytest.fail)
+        fresh._load_package_cache()
+        assert fresh.package_cache == manager.package_cache
+
+    def test_write_uses_unique_temp_file(self, manager, tmp_path, monkeypatch):
+        """Кэш пишется через собственный временный файл в каталоге кэша."""
+        temp_dirs = []
+        mkstemp = package_manager.tempfile.mkstemp
+
+        def tracking_mkstemp(**kwargs):
+            temp_dirs.append(kwargs.get('dir'))
+            return mkstemp(**kwargs)
+
+        monkeypatch.setattr(package_manager.tempfile, 'mkstemp', tracking_mkstemp)
+        manager._load_package_cache()
+
+        assert temp_dirs == [str(tmp_path)]
+        assert os.listdir(tmp_path) == [os.path.basename(manager._cache_file_path())]
+
+    def test_stale_cache_ignored(self, manager):
+        """Кэш старше CACHE_MAX_AGE не используется."""
+        manager._load_package_cache()
+        cache_path = manager._cache_file_path()
+        stale = time.time() - package_manager.CACHE_MAX_AGE - 60
+        os.utime(cache_path, (stale, stale))
+
+        assert manager._read_disk_cache(cache_path) is None
+
+    def test_corrupt_cache_falls_back_to_download(self, manager):
+        """Повреждённый файл кэша приводит к загрузке из репозитория."""
+        cache_path = manager._cache_file_path()
+        with open(cache_path, 'wb') as f:
+            f.write(b'not a gzip pickle')
+
+        manager._load_package_cache()
+
+        assert manager.downloads == 1
+        assert set(manager.package_cache) == {'a', 'b'}
+        assert manager._read_disk_cache(cache_path) == manager.package_cache
@@ -3,22 +3,19 @@
 import pytest
 import os
 import tempfile
-import sys
-import os
-
-# Добавляем корень проекта в путь для импортов
-project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-sys.path.insert(0, project_root)
+from argparse import Namespace
 
 from validators import (
     validate_package_name,
+    validate_package_names,
     validate_repository,
     validate_mode,
     validate_version,
     validate_output_file,
     validate_ascii_mode,
     validate_max_depth,
-    validate_filter
+    validate_filter,
+    validate_cli_args
 )
 
 
@@ -39,6 +36,28 @@ class TestValidatePackageName:
         with pytest.raises(ValueError):
             validate_package_name("invalid@name")
 
+        with pytest.raises(ValueError):
+            validate_package_name("пакет")
+
+    def test_trailing_newline_rejected(self):
+        """Имя должно проверяться целиком, включая завершающий перевод строки."""
+        with pytest.raises(ValueError):
+            validate_package_name("bash\n")
+
+
+class TestValidatePackageNames:
+    """Тесты для функции validate_package_names."""
+
+    def test_valid_package_names(self):
+        """Тестирование списка валидных имен пакетов."""
+        assert validate_package_names(["bash", "libc6", "python3.8"]) == ["bash", "libc6", "python3.8"]
+        assert validate_package_names(iter(["my-package"])) == ["my-package"]
+
+    def test_invalid_package_names(self):
+        """Тестирование списка с невалидными именами пакетов."""
+        with pytest.raises(ValueError, match="invalid@name"):
+            validate_package_names(["bash", "invalid@name", ""])
+
 
 class TestValidateRepository:
     """Тесты для функции validate_repository."""
@@ -83,6 +102,17 @@ class TestValidateVersion:
         with pytest.raises(ValueError):
             validate_version("1")
 
+        with pytest.raises(ValueError):
+            validate_version("1.2.3.4")
+
+        with pytest.raises(ValueError):
+            validate_version("1.²")
+
+    def test_trailing_newline_rejected(self):
+        """Версия должна проверяться целиком, включая завершающий перевод строки."""
+        with pytest.raises(ValueError):
+            validate_version("1.0\n")
+
 
 class TestValidateOutputFile:
     """Тесты для функции validate_output_file."""
@@ -105,6 +135,7 @@ class TestValidateAsciiMode:
         """Тестирование валидных значений ASCII-режима."""
         assert validate_ascii_mode("yes") == "yes"
         assert validate_ascii_mode("no") == "no"
+        assert validate_ascii_mode("YES") == "yes"
 
     def test_invalid_ascii_modes(self):
         """Тестирование невалидных значений ASCII-режима."""
@@ -125,6 +156,14 @@ class TestValidateMaxDepth:
         with pytest.raises(ValueError):
             validate_max_depth("not_a_number")
 
+    def test_non_positive_max_depth(self):
+        """Тестирование неположительных значений глубины."""
+        with pytest.raises(ValueError, match="положительным"):
+            validate_max_depth("0")
+
+        with pytest.raises(ValueError, match="положительным"):
+            validate_max_depth("-3")
+
 
 class TestValidateFilter:
     """Тесты для функции validate_filter."""
@@ -137,4 +176,26 @@ class TestValidateFilter:
     def test_invalid_filters(self):
         """Тестирование невалидных фильтров."""
         with pytest.raises(ValueError):
-            validate_filter("a")
\ No newline at end of file
+            validate_filter("a")
+
+
+class TestValidateCliArgs:
+    """Тесты для функции validate_cli_args."""
+
+    def test_valid_args(self):
+        """Тестирование полного набора валидных аргументов."""
+        args = Namespace(package="bash", repo="https://example.com/repo", mode="remote",
+                         version="1.0", output="graph.png", ascii="YES",
+                         max_depth="3", filter="")
+        assert vars(validate_cli_args(args)) == dict(
+            package="bash", repo="https://example.com/repo", mode="remote",
+            version="1.0", output="graph.png", ascii="yes", max_depth=3, filter=""
+        )
+
+    def test_invalid_args(self):
+        """Тестирование набора аргументов с ошибкой."""
+        args = Namespace(package="bash", repo="https://example.com/repo", mode="invalid",
+                         version="1.0", output="graph.png", ascii="no",
+                         max_depth="3", filter="")
+        with pytest.raises(ValueError):
+            validate_cli_args(args)
@@ -1,99 +1,183 @@
 """Функции валидации входных параметров CLI."""
 
 import os
-import re
-from urllib.parse import urlparse
+import string
+import sys
+from functools import lru_cache
+from types import SimpleNamespace
+from typing import Any, Iterable, List, Tuple
+
+# Таблица удаления допустимых символов: после translate в корректном
+# имени пакета не остаётся ни одного символа
+_PKG_NAME_ALLOWED = str.maketrans("", "", string.ascii_letters + string.digits + "._-")
+
+_VALID_MODES = frozenset(("local", "remote", "mixed"))
+_VALID_MODES_MSG = "local, remote, mixed"
+_VALID_ASCII = frozenset(("yes", "no"))
+# Канонические (интернированные) значения: результат валидации можно
+# сравнивать по идентичности, а поиск в словаре заменяет проверку вхождения
+_MODE_CANON = {mode: sys.intern(mode) for mode in _VALID_MODES}
+_ASCII_CANON = {value: sys.intern(value) for value in _VALID_ASCII}
+_OUTPUT_SUFFIXES = (".png", ".jpg", ".svg")
+_OUTPUT_SUFFIX_MSG = ".png, .jpg, .svg"
+_URL_SCHEMES = frozenset(("http", "https", "ftp", "file", "git", "ssh"))
+
+
+def _check_package_name(name: str) -> Tuple[bool, str]:
+    # Проверка без исключений: (True, имя) или (False, текст ошибки)
+    if not name:
+        return False, "Имя пакета не может быть пустым"
+
+    if name.translate(_PKG_NAME_ALLOWED):
+        return False, "Некорректное имя пакета. Допустимы буквы, цифры, _, - и ."
+
+    return True, name
 
 
+# Валидаторы, зависящие только от строки, кэшируются через lru_cache;
+# validate_repository не кэшируется, так как проверяет файловую систему.
+@lru_cache(maxsize=256)
 def validate_package_name(name: str) -> str:
-    if not name:
-        raise ValueError("Имя пакета не может быть пустым")
+    ok, result = _check_package_name(name)
+    if not ok:
+        raise ValueError(result)
+
+    return result
 
-    if not re.match(r"^[a-zA-Z0-9._\-]+$", name):
-        raise ValueError("Некорректное имя пакета. Допустимы буквы, цифры, _, - и .")
 
-    return name
+def validate_package_names(names: Iterable[str]) -> List[str]:
+    # Пакетная проверка: все некорректные имена собираются в одну ошибку
+    names = list(names)
+    check = _check_package_name
+    invalid = [name for name in names if not check(name)[0]]
+
+    if invalid:
+        raise ValueError(f"Некорректные имена пакетов: {', '.join(map(repr, invalid))}")
+
+    return names
 
 
 def validate_repository(url_or_path: str) -> str:
     if not url_or_path:
         raise ValueError("Репозиторий не может быть пустым")
 
+    # Импорт по требованию: urllib.parse нужен только этому валидатору
+    from urllib.parse import urlparse
+
+    # Явный URL распознаётся без обращения к файловой системе
+    parsed = urlparse(url_or_path)
+    if parsed.scheme in _URL_SCHEMES and parsed.netloc:
+        return url_or_path
+
     # Проверка локального пути
     if os.path.exists(url_or_path):
+        # abspath вызывает getcwd(), что не нужно для абсолютного пути
+        if os.path.isabs(url_or_path):
+            return os.path.normpath(url_or_path)
         return os.path.abspath(url_or_path)
 
-    # Проверка URL
-    parsed = urlparse(url_or_path)
+    # Проверка URL с прочими схемами
     if parsed.scheme and parsed.netloc:
         return url_or_path
 
     raise ValueError("Некорректный путь или URL репозитория. Должен быть существующий путь или валидный URL")
 
 
+@lru_cache(maxsize=256)
 def validate_mode(mode: str) -> str:
-    valid_modes = ["local", "remote", "mixed"]
-
     if not mode:
         raise ValueError("Режим работы не может быть пустым")
 
-    if mode not in valid_modes:
-        raise ValueError(f"Некорректный режим работы. Доступные значения: {', '.join(valid_modes)}")
+    canonical = _MODE_CANON.get(mode)
+    if canonical is None:
+        raise ValueError(f"Некорректный режим работы. Доступные значения: {_VALID_MODES_MSG}")
 
-    return mode
+    return canonical
 
 
+@lru_cache(maxsize=256)
 def validate_version(version: str) -> str:
     if not version:
         raise ValueError("Версия пакета не может быть пустой")
 
-    if not re.match(r"^[0-9]+\.[0-9]+(\.[0-9]+)?$", version):
+    # isascii отсекает не-ASCII цифры, которые isdigit тоже считает цифрами
+    parts = version.split(".")
+    if len(parts) not in (2, 3) or not all(p.isascii() and p.isdigit() for p in parts):
         raise ValueError("Некорректная версия пакета. Формат: X.Y или X.Y.Z")
 
     return version
 
 
+@lru_cache(maxsize=256)
 def validate_output_file(filename: str) -> str:
     if not filename:
         raise ValueError("Имя файла графа не может быть пустым")
 
-    supported_formats = [".png", ".jpg", ".svg"]
-    if not any(filename.endswith(fmt) for fmt in supported_formats):
-        raise ValueError(f"Имя файла для графа должно оканчиваться на {', '.join(supported_formats)}")
+    if not filename.endswith(_OUTPUT_SUFFIXES):
+        raise ValueError(f"Имя файла для графа должно оканчиваться на {_OUTPUT_SUFFIX_MSG}")
 
     return filename
 
 
+@lru_cache(maxsize=256)
 def validate_ascii_mode(value: str) -> str:
     if not value:
         raise ValueError("Параметр ASCII-вывода не может быть пустым")
 
-    value_lower = value.lower()
-    if value_lower not in ["yes", "no"]:
+    # Обычно значение уже в нижнем регистре: lower() нужен только для прочих
+    canonical = _ASCII_CANON.get(value)
+    if canonical is None:
+        canonical = _ASCII_CANON.get(value.lower())
+    if canonical is None:
         raise ValueError("Режим вывода ASCII-дерева должен быть 'yes' или 'no'")
 
-    return value_lower
+    return canonical
 
 
+@lru_cache(maxsize=256)
 def validate_max_depth(value: str) -> int:
     if not value:
         raise ValueError("Максимальная глубина не может быть пустой")
 
-    try:
-        depth = int(value)
-        if depth <= 0:
-            raise ValueError("Максимальная глубина должна быть положительным числом")
-        return depth
-    except ValueError:
+    # Проверка формата без исключений: int() вызывается только для
+    # заведомо корректной строки
+    stripped = value.strip()
+    digits = stripped[1:] if stripped.startswith("-") else stripped
+    if not (digits.isascii() and digits.isdigit()):
         raise ValueError("Максимальная глубина должна быть целым числом")
 
+    depth = int(stripped)
+    if depth <= 0:
+        raise ValueError("Максимальная глубина должна быть положительным числом")
 
-def validate_filter(substring: str) -> str:
-    # Пустой фильтр допустим
-    if not substring:
-        return ""
+    return depth
 
-    if len(substring) < 2:
+
+@lru_cache(maxsize=256)
+def validate_filter(substring: str) -> str:
+    # Пустой фильтр допустим, одиночный символ - нет
+    if 0 < len(substring) < 2:
         raise ValueError("Фильтр должен содержать не менее 2 символов")
 
     return substring
+
+
+# Порядок проверки аргументов CLI: (атрибут argparse, валидатор)
+_CLI_VALIDATORS = (
+    ("package", validate_package_name),
+    ("repo", validate_repository),
+    ("mode", validate_mode),
+    ("version", validate_version),
+    ("output", validate_output_file),
+    ("ascii", validate_ascii_mode),
+    ("max_depth", validate_max_depth),
+    ("filter", validate_filter),
+)
+
+
+def validate_cli_args(args: Any) -> SimpleNamespace:
+    # Проверяет все аргументы CLI за один вызов и возвращает проверенные
+    # значения под теми же именами атрибутов, что и у args
+    return SimpleNamespace(**{
+        field: validator(getattr(args, field)) for field, validator in _CLI_VALIDATORS
+    })